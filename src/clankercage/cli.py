@@ -1,62 +1,228 @@
 """CLI entry points for ClankerCage."""
 
-import argparse
-import json
+from __future__ import annotations
+
 import os
-import shlex
-import shutil
 import subprocess
 import sys
-import uuid
+from functools import cache
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+# argparse, hashlib, json, shlex, shutil, time and uuid are imported inside
+# the functions that use them, so importing this module (as the test helpers
+# do) stays cheap; orjson is optional and only used when installed.
+if TYPE_CHECKING:
+    import argparse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 __all__ = ["main", "shell_remote"]
 
 
+@cache
 def get_embedded_devcontainer_dir() -> Path:
     """Get the path to embedded devcontainer files in the package."""
     return Path(__file__).parent / "devcontainer"
 
 
+@cache
+def get_cache_dir() -> Path:
+    """Get the ClankerCage cache directory."""
+    return Path.home() / ".cache" / "clankercage"
+
+
+@cache
 def get_workspace_dir(instance_id: str) -> Path:
     """Get instance-specific workspace directory for devcontainer files.
 
     Each instance gets its own directory to prevent race conditions when
     multiple ClankerCage instances run with different configurations.
     """
-    return Path.home() / ".cache" / "clankercage" / f"workspace-{instance_id}"
+    return get_cache_dir() / f"workspace-{instance_id}"
+
+
+def ensure_dir(path: Path) -> None:
+    """Create a directory and its parents unless it already exists.
+
+    A single stat is cheaper than mkdir walking every parent on each run.
+    """
+    if not os.path.isdir(path):
+        path.mkdir(parents=True, exist_ok=True)
+
+
+def copy_if_changed(src: str, dst: str) -> str:
+    """Link or copy a file unless the destination already matches its size and mtime.
+
+    Used by extract_devcontainer_files. Extracted files are never
+    modified in place, so a hardlink to the package file is tried first and
+    avoids copying any data; a real copy is made only when linking fails
+    (different filesystem, protected_hardlinks, unsupported filesystem).
+    Concurrent extractions into the same directory are safe: copies are
+    renamed into place, and a destination another process created wins.
+    """
+    import errno
+    import shutil
+    import tempfile
+
+    src_stat = os.stat(src)
+
+    def is_current() -> bool:
+        try:
+            dst_stat = os.stat(dst)
+        except FileNotFoundError:
+            return False
+        return (dst_stat.st_size, dst_stat.st_mtime_ns) == (src_stat.st_size, src_stat.st_mtime_ns)
+
+    if is_current():
+        return dst
+    try:
+        os.unlink(dst)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.link(src, dst)
+        return dst
+    except FileExistsError:
+        # Another process extracted it between the unlink and the link
+        if is_current():
+            return dst
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP):
+            raise
+
+    # copyfile uses the kernel fast-copy path (sendfile on Linux, CopyFile2 on Windows)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dst), prefix=f".{os.path.basename(dst)}.")
+    os.close(fd)
+    try:
+        shutil.copyfile(src, tmp_path)
+        shutil.copystat(src, tmp_path)
+        os.replace(tmp_path, dst)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return dst
+
+
+# Files staged from the package directory; devcontainer.json is rendered
+# separately by prepare_devcontainer
+DEVCONTAINER_FILES = (
+    "Dockerfile",
+    "add-domain-to-firewall.sh",
+    "init-firewall.sh",
+    "safe-rm",
+    "setup-gpg.sh",
+    "whitelisted-domains.txt",
+)
 
 
 def extract_devcontainer_files(instance_id: str) -> Path:
-    """Extract embedded devcontainer files to an instance-specific cache directory."""
+    """Extract embedded devcontainer files to an instance-specific cache directory.
+
+    Files already extracted with a matching size and mtime are left untouched,
+    so warm starts cost one stat per file instead of a full copy.
+    """
     workspace_dir = get_workspace_dir(instance_id)
     devcontainer_dir = workspace_dir / ".devcontainer"
-    devcontainer_dir.mkdir(parents=True, exist_ok=True)
-
+    ensure_dir(devcontainer_dir)
     pkg_dir = get_embedded_devcontainer_dir()
-    for f in pkg_dir.iterdir():
-        if f.is_file() and f.name != "__init__.py" and not f.name.endswith(".pyc"):
-            shutil.copy2(f, devcontainer_dir / f.name)
-
+    for name in DEVCONTAINER_FILES:
+        copy_if_changed(os.path.join(pkg_dir, name), os.path.join(devcontainer_dir, name))
     return workspace_dir
 
 
+FIREWALL_INIT_COMMAND = "sudo /usr/local/bin/init-firewall.sh"
+POST_START_SCRIPT = "/home/node/post-start.sh"
+
+
 def generate_ssh_config(runtime_dir: Path, ssh_key_name: str) -> Path:
-    """Generate SSH config file for GitHub."""
+    """Generate SSH config file for GitHub.
+
+    The file is left untouched when it already has the expected content.
+    """
     ssh_config = runtime_dir / "ssh_config"
-    ssh_config.write_text(f"""Host github.com
+    content = f"""Host github.com
   HostName github.com
   User git
   IdentityFile /home/node/.ssh/{ssh_key_name}
   IdentitiesOnly yes
-""")
+"""
+    try:
+        if ssh_config.read_text() == content:
+            return ssh_config
+    except FileNotFoundError:
+        pass
+    ssh_config.write_text(content)
     # SSH requires strict permissions on config files
     ssh_config.chmod(0o644)
     return ssh_config
 
 
+def generate_post_start_script(runtime_dir: Path, commands: list[str]) -> Path:
+    """Generate the postStartCommand script.
+
+    The script is written to the instance cache directory rather than the
+    shared ~/.claude mount, and rewritten on every run so a modified copy is
+    never executed.
+    """
+    script_path = runtime_dir / "post-start.sh"
+    script_path.write_text("#!/bin/bash\nset -e\n" + "\n".join(commands) + "\n")
+    # Must be readable by the container's node user, whatever UID it maps to;
+    # chmod also resets the mode of a file left by an earlier run
+    script_path.chmod(0o644)
+    return script_path
+
+
+def get_post_start_commands(args: argparse.Namespace) -> list[str] | None:
+    """Build the post-start commands, or None when only the firewall needs initializing."""
+    if not (args.git_user_name or args.git_user_email or args.gpg_key_id or args.gh_token):
+        return None
+
+    import shlex
+
+    commands = [FIREWALL_INIT_COMMAND]
+
+    if args.git_user_name:
+        commands.append(f"git config --global user.name {shlex.quote(args.git_user_name)}")
+
+    if args.git_user_email:
+        commands.append(f"git config --global user.email {shlex.quote(args.git_user_email)}")
+
+    if args.gpg_key_id:
+        commands.extend([
+            f"git config --global user.signingkey {shlex.quote(args.gpg_key_id)}",
+            "git config --global commit.gpgsign true",
+            "git config --global gpg.program gpg",
+            "gpg-connect-agent /bye >/dev/null 2>&1 || true",
+        ])
+
+    if args.gh_token:
+        commands.append(f"echo {shlex.quote(args.gh_token)} | gh auth login --with-token")
+
+    return commands
+
+
+def write_runtime_files(args: argparse.Namespace, runtime_dir: Path) -> tuple[Path | None, Path | None]:
+    """Write the SSH config and post-start script that args call for.
+
+    Returns their paths (None when not needed). Runs even when a cached
+    devcontainer.json is reused, since that config mounts these files.
+    """
+    ssh_config_path = None
+    if args.ssh_key_file:
+        ssh_config_path = generate_ssh_config(runtime_dir, os.path.basename(os.path.abspath(args.ssh_key_file)))
+    commands = get_post_start_commands(args)
+    script_path = generate_post_start_script(runtime_dir, commands) if commands else None
+    return ssh_config_path, script_path
+
+
 def modify_config(config: dict, args: argparse.Namespace, runtime_dir: Path, devcontainer_dir: Path | None = None, project_dir: Path | None = None) -> dict:
     """Modify devcontainer config with user-specific settings."""
+    ssh_config_path, script_path = write_runtime_files(args, runtime_dir)
 
     # If --build flag, replace image with build config
     if args.build and devcontainer_dir:
@@ -67,29 +233,27 @@ def modify_config(config: dict, args: argparse.Namespace, runtime_dir: Path, dev
     if project_dir:
         config["workspaceMount"] = f"source={project_dir},target=/workspace,type=bind,consistency=delegated"
 
-    # Replace .claude docker volume with read-only bind mount for security
-    # This prevents container from modifying settings, hooks, or stealing API keys
     if "mounts" in config:
-        config["mounts"] = [
-            m.replace(
-                "source=claude-code-config-${devcontainerId},target=/home/node/.claude,type=volume",
-                "source=${localEnv:HOME}/.claude,target=/home/node/.claude,type=bind,readonly"
-            ) if "claude-code-config" in m else m
-            for m in config["mounts"]
-        ]
-
-    # Filter out existing SSH and GPG mounts
-    if "mounts" in config:
-        config["mounts"] = [
-            m for m in config["mounts"]
-            if ".ssh/" not in m and ".gnupg" not in m
-        ]
+        mounts = []
+        for m in config["mounts"]:
+            # Filter out existing SSH and GPG mounts
+            if ".ssh/" in m or ".gnupg" in m:
+                continue
+            # Replace .claude docker volume with read-only bind mount for security
+            # This prevents container from modifying settings, hooks, or stealing API keys
+            if "claude-code-config" in m:
+                m = m.replace(
+                    "source=claude-code-config-${devcontainerId},target=/home/node/.claude,type=volume",
+                    "source=${localEnv:HOME}/.claude,target=/home/node/.claude,type=bind,readonly"
+                )
+            mounts.append(m)
+        config["mounts"] = mounts
 
     # Add SSH mounts if key provided
     if args.ssh_key_file:
-        ssh_key_path = Path(args.ssh_key_file).resolve()
+        # abspath avoids resolve()'s per-component lstat; symlinks are passed to Docker as-is
+        ssh_key_path = Path(os.path.abspath(args.ssh_key_file))
         ssh_key_name = ssh_key_path.name
-        ssh_config_path = generate_ssh_config(runtime_dir, ssh_key_name)
 
         config.setdefault("mounts", [])
         config["mounts"].append(
@@ -122,31 +286,120 @@ def modify_config(config: dict, args: argparse.Namespace, runtime_dir: Path, dev
         for env_var in args.env:
             config["runArgs"].extend(["-e", env_var])
 
-    # Build postStartCommand
-    commands = ["sudo /usr/local/bin/init-firewall.sh"]
+    # Without git identity or auth args, only the firewall needs initializing
+    if script_path is None:
+        config["postStartCommand"] = FIREWALL_INIT_COMMAND
+        return config
 
-    if args.git_user_name:
-        commands.append(f"git config --global user.name {shlex.quote(args.git_user_name)}")
+    # Run from a mounted script so the container shell doesn't re-parse a long one-liner
+    config.setdefault("mounts", [])
+    config["mounts"].append(
+        f"source={script_path},target={POST_START_SCRIPT},type=bind,readonly"
+    )
+    config["postStartCommand"] = f"bash {POST_START_SCRIPT}"
 
-    if args.git_user_email:
-        commands.append(f"git config --global user.email {shlex.quote(args.git_user_email)}")
+    return config
 
-    if args.gpg_key_id:
-        commands.append(f"git config --global user.signingkey {shlex.quote(args.gpg_key_id)}")
-        commands.append("git config --global commit.gpgsign true")
-        commands.append("git config --global gpg.program gpg")
-        commands.append("gpg-connect-agent /bye >/dev/null 2>&1 || true")
 
-    if args.gh_token:
-        commands.append(f"echo {shlex.quote(args.gh_token)} | gh auth login --with-token")
+def load_json(path: Path) -> dict:
+    """Read a JSON file, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
 
-    config["postStartCommand"] = " && ".join(commands)
+    import json
 
-    return config
+    return json.loads(path.read_bytes())
+
+
+def write_json(path: Path, data: dict) -> None:
+    """Write data as indented JSON, using orjson when it is installed.
+
+    The file is written to a temporary sibling and renamed into place, so an
+    existing file (or hardlink) at path is replaced rather than modified.
+    """
+    if orjson is not None:
+        content = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        import json
+
+        content = json.dumps(data, indent=2).encode()
+
+    import tempfile
+
+    # A unique temp name per writer, so concurrent runs never rename each other's file
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+# Options that only change the command exec'd in the container, not the container itself
+EXEC_ONLY_ARGS = frozenset({"shell", "safe_mode", "fresh"})
+
+
+def get_container_settings(args: argparse.Namespace) -> list[tuple[str, object]]:
+    """Args that affect the container, sorted so the order they were parsed in doesn't matter."""
+    return sorted((k, v) for k, v in vars(args).items() if k not in EXEC_ONLY_ARGS)
+
+
+def get_config_key(args: argparse.Namespace, source_config: Path, project_dir: Path) -> str:
+    """Hash every input that affects the rendered devcontainer.json."""
+    import hashlib
+
+    source_stat = source_config.stat()
+    # modify_config lives in this module, so editing it must re-render too
+    cli_stat = Path(__file__).stat()
+    key_input = (
+        get_container_settings(args),
+        source_stat.st_size,
+        source_stat.st_mtime_ns,
+        cli_stat.st_size,
+        cli_stat.st_mtime_ns,
+        str(project_dir),
+    )
+    return hashlib.blake2b(repr(key_input).encode(), digest_size=16).hexdigest()
+
+
+def get_instance_id(args: argparse.Namespace, project_dir: Path) -> str:
+    """Get the instance ID used for the cache directory and container label.
+
+    Runs in the same project with the same container options share an ID, so
+    devcontainer up reattaches to the already running container instead of
+    booting a new one. The package version, the devcontainer.json template
+    and this module are part of the ID, so an upgrade or a local edit starts a
+    new container rather than reusing one with stale mounts. --fresh gives a new random ID, as every
+    run used to.
+    """
+    if args.fresh:
+        import uuid
+
+        return uuid.uuid4().hex[:12]
+    import hashlib
+
+    from clankercage import __version__
+
+    source_stat = (get_embedded_devcontainer_dir() / "devcontainer.json").stat()
+    cli_stat = Path(__file__).stat()
+    key_input = (
+        str(project_dir),
+        get_container_settings(args),
+        __version__,
+        source_stat.st_size,
+        source_stat.st_mtime_ns,
+        cli_stat.st_size,
+        cli_stat.st_mtime_ns,
+    )
+    return hashlib.blake2b(repr(key_input).encode(), digest_size=6).hexdigest()
 
 
 def create_parser() -> argparse.ArgumentParser:
     """Create the argument parser."""
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Run Claude Code in a sandboxed devcontainer",
         epilog="Any additional arguments are passed to claude."
@@ -159,6 +412,7 @@ def create_parser() -> argparse.ArgumentParser:
     parser.add_argument("--build", action="store_true", help="Build from local Dockerfile instead of using pre-built image")
     parser.add_argument("--shell", metavar="CMD", help="Run a shell command instead of claude (for testing)")
     parser.add_argument("--safe-mode", action="store_true", help="Run Claude with permission prompts enabled (more interruptions, extra safety)")
+    parser.add_argument("--fresh", action="store_true", help="Start a new container instead of reusing this project's running one")
     # Docker run flags - passed directly to runArgs
     parser.add_argument("-p", "--port", action="append", metavar="HOST:CONTAINER",
                         help="Map a port from host to container (can be specified multiple times)")
@@ -171,23 +425,87 @@ def create_parser() -> argparse.ArgumentParser:
 
 def apply_env_defaults(args: argparse.Namespace) -> None:
     """Apply environment variable defaults to args."""
-    args.ssh_key_file = args.ssh_key_file or os.environ.get("CLANKERCAGE_SSH_KEY")
-    args.git_user_name = args.git_user_name or os.environ.get("CLANKERCAGE_GIT_USER_NAME")
-    args.git_user_email = args.git_user_email or os.environ.get("CLANKERCAGE_GIT_USER_EMAIL")
-    args.gh_token = args.gh_token or os.environ.get("CLANKERCAGE_GH_TOKEN")
-    args.gpg_key_id = args.gpg_key_id or os.environ.get("CLANKERCAGE_GPG_KEY_ID")
+    env = os.environ
+    args.ssh_key_file = args.ssh_key_file or env.get("CLANKERCAGE_SSH_KEY")
+    args.git_user_name = args.git_user_name or env.get("CLANKERCAGE_GIT_USER_NAME")
+    args.git_user_email = args.git_user_email or env.get("CLANKERCAGE_GIT_USER_EMAIL")
+    args.gh_token = args.gh_token or env.get("CLANKERCAGE_GH_TOKEN")
+    args.gpg_key_id = args.gpg_key_id or env.get("CLANKERCAGE_GPG_KEY_ID")
+
+
+# How long a devcontainer CLI lookup is trusted before searching again
+DEVCONTAINER_BIN_MAX_AGE = 24 * 60 * 60
+
+
+def find_devcontainer_script() -> str | None:
+    """Locate an installed devcontainer CLI script.
+
+    Checks the global npm root first, then the packages npx has already
+    downloaded into the npm cache, so a previous `npx -y` run is reused
+    directly instead of being re-resolved.
+    """
+    try:
+        result = subprocess.run(["npm", "root", "-g"], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    if result.returncode == 0:
+        script = Path(result.stdout.strip()) / "@devcontainers" / "cli" / "devcontainer.js"
+        if script.is_file():
+            return str(script)
+
+    npm_cache = Path(os.environ.get("npm_config_cache") or Path.home() / ".npm")
+    scripts = list(npm_cache.glob("_npx/*/node_modules/@devcontainers/cli/devcontainer.js"))
+    return str(max(scripts, key=os.path.getmtime)) if scripts else None
+
+
+def get_devcontainer_cmd() -> list[str]:
+    """Get the command prefix used to invoke the devcontainer CLI.
+
+    npx resolves the package on every call, costing a Node startup each time,
+    so prefer a devcontainer binary on PATH or a globally installed script.
+    The script lookup result (including "not installed") is cached in the
+    cache directory for DEVCONTAINER_BIN_MAX_AGE.
+    """
+    import shutil
+    import time
+
+    binary = shutil.which("devcontainer")
+    if binary:
+        return [binary]
+
+    npx_cmd = ["npx", "-y", "@devcontainers/cli"]
+    cache_file = get_cache_dir() / "devcontainer-bin"
+    try:
+        script = cache_file.read_text()
+        if script and os.path.isfile(script):
+            return ["node", script]
+        if not script and time.time() - cache_file.stat().st_mtime < DEVCONTAINER_BIN_MAX_AGE:
+            return npx_cmd
+    except FileNotFoundError:
+        pass
+
+    script = find_devcontainer_script() or ""
+    ensure_dir(cache_file.parent)
+    cache_file.write_text(script)
+    return ["node", script] if script else npx_cmd
 
 
 def run_devcontainer(config_path: Path, workspace_dir: Path, project_dir: Path, claude_args: list[str], shell_cmd: str | None = None, safe_mode: bool = False, instance_id: str | None = None) -> None:
     """Run the devcontainer with claude or a shell command.
 
-    Each invocation uses a unique instance ID for both the config directory
-    and container label, allowing multiple clanker instances to run simultaneously.
+    The instance ID names both the config directory and the container label;
+    runs sharing an ID share a container, and --fresh starts a separate one.
     """
-    devcontainer_cmd = ["npx", "-y", "@devcontainers/cli"]
+    import shutil
+
+    devcontainer_cmd = get_devcontainer_cmd()
+    # Resolve the executable once so neither the up call nor the exec rescans PATH
+    devcontainer_cmd[0] = shutil.which(devcontainer_cmd[0]) or devcontainer_cmd[0]
 
     # Use provided instance ID or generate one (for backwards compatibility)
     if instance_id is None:
+        import uuid
+
         instance_id = uuid.uuid4().hex[:12]
     id_label = f"clanker.instance={instance_id}"
 
@@ -216,39 +534,84 @@ def run_devcontainer(config_path: Path, workspace_dir: Path, project_dir: Path,
         "--id-label", id_label,
     ] + run_cmd
 
-    # Use execvp to replace process for clean TTY passthrough
-    os.execvp("npx", exec_cmd)
+    # Use execv to replace process for clean TTY passthrough
+    os.execv(exec_cmd[0], exec_cmd)
 
 
 IMAGE_NAME = "ghcr.io/clankerbot/clankercage:latest"
+DOCKER_SOCKET = "/var/run/docker.sock"
+
+# Display names for the image source label; anything else is a local build
+SOURCE_DISPLAY = {"ghcr.io": "GitHub Container Registry (ghcr.io)"}
+
+DOCKER_UNAVAILABLE_MESSAGE = (
+    "\n"
+    "╔════════════════════════════════════════════════════════════════╗\n"
+    "║  ERROR: Docker is not running or not accessible               ║\n"
+    "╠════════════════════════════════════════════════════════════════╣\n"
+    "║  ClankerCage requires Docker to run.                          ║\n"
+    "║                                                                ║\n"
+    "║  Please ensure:                                               ║\n"
+    "║    1. Docker is installed                                     ║\n"
+    "║    2. Docker daemon is running                                ║\n"
+    "║    3. You have permission to access Docker                    ║\n"
+    "║       (try: sudo usermod -aG docker $USER)                    ║\n"
+    "╚════════════════════════════════════════════════════════════════╝\n"
+)
+
+# How long a successful image presence check is trusted before re-checking
+IMAGE_STAMP_MAX_AGE = 24 * 60 * 60
+
+
+@cache
+def get_docker_executable() -> str:
+    """Resolve the docker CLI to an absolute path once per process."""
+    import shutil
+
+    return shutil.which("docker") or "docker"
+
+
+def run_docker(args: list[str], **kwargs) -> subprocess.CompletedProcess:
+    """Run a docker CLI command.
+
+    With an absolute executable path and close_fds=False, subprocess launches
+    the child via posix_spawn instead of forking the interpreter. Descriptors
+    Python opens are non-inheritable by default (PEP 446), so none leak.
+    """
+    return subprocess.run([get_docker_executable(), *args], close_fds=False, **kwargs)
 
 
 def get_container_info(image_name: str) -> dict:
     """Get container build info from Docker image labels.
 
-    Returns dict with 'build_time' and 'source' keys.
+    Returns dict with 'build_time', 'source' and 'present' keys; 'present' is
+    False when the image could not be inspected (e.g. it has not been pulled).
     """
-    result = subprocess.run(
-        ["docker", "image", "inspect", image_name, "--format",
+    result = run_docker(
+        ["image", "inspect", image_name, "--format",
          '{{index .Config.Labels "org.opencontainers.image.created"}}|{{index .Config.Labels "org.opencontainers.image.source.type"}}'],
         capture_output=True,
         text=True
     )
     if result.returncode != 0:
-        return {"build_time": "unknown", "source": "unknown"}
+        return {"build_time": "unknown", "source": "unknown", "present": False}
 
     parts = result.stdout.strip().split("|")
     build_time = parts[0] if parts[0] else "unknown"
     source = parts[1] if len(parts) > 1 and parts[1] else "local"
 
-    return {"build_time": build_time, "source": source}
+    return {"build_time": build_time, "source": source, "present": True}
+
 
+def print_container_info(image_name: str, info: dict | None = None) -> None:
+    """Print container build information on startup.
 
-def print_container_info(image_name: str) -> None:
-    """Print container build information on startup."""
-    info = get_container_info(image_name)
+    Pass info when get_container_info() has already been called for the image.
+    """
+    if info is None:
+        info = get_container_info(image_name)
 
-    source_display = "GitHub Container Registry (ghcr.io)" if info["source"] == "ghcr.io" else "Local build"
+    source_display = SOURCE_DISPLAY.get(info["source"], "Local build")
     build_time_display = info["build_time"] if info["build_time"] != "unknown" else "Unknown"
 
     print(f"Container image: {image_name}")
@@ -257,41 +620,143 @@ def print_container_info(image_name: str) -> None:
     print()
 
 
+def docker_context_selected() -> bool:
+    """Check whether the docker CLI is pointed at a non-default context.
+
+    The context comes from DOCKER_CONTEXT or the currentContext key of the
+    CLI config file (in DOCKER_CONFIG, default ~/.docker). An unreadable
+    config counts as no context, matching the docker CLI's default.
+    """
+    if os.environ.get("DOCKER_CONTEXT"):
+        return True
+    config_dir = os.environ.get("DOCKER_CONFIG") or Path.home() / ".docker"
+    try:
+        config = load_json(Path(config_dir) / "config.json")
+    except (OSError, ValueError):
+        return False
+    return isinstance(config, dict) and config.get("currentContext") not in (None, "", "default")
+
+
+def docker_socket_reachable() -> bool:
+    """Ping the local Docker daemon over its socket.
+
+    Sends the API's /_ping request directly, skipping the docker CLI's
+    startup. Returns False whenever the answer is not conclusive (DOCKER_HOST
+    or a docker context set, no socket, permission denied, unexpected reply)
+    so callers fall back to the docker CLI.
+    """
+    import socket
+
+    if os.environ.get("DOCKER_HOST") or not hasattr(socket, "AF_UNIX"):
+        return False
+    # A context may point at a different daemon than the default socket
+    if docker_context_selected():
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.5)
+        try:
+            sock.connect(DOCKER_SOCKET)
+            sock.sendall(b"GET /_ping HTTP/1.0\r\nHost: docker\r\n\r\n")
+            status_line = sock.recv(64).split(b"\r\n", 1)[0]
+        except OSError:
+            return False
+    return status_line.startswith(b"HTTP/1.") and status_line.split(b" ")[1:2] == [b"200"]
+
+
 def check_docker_accessible() -> None:
     """Check if Docker is running and accessible. Exit with error if not."""
-    result = subprocess.run(
-        ["docker", "info"],
-        capture_output=True,
-        text=True
+    # Connecting to the daemon socket takes microseconds; the CLI fallback
+    # asks only for the server version rather than the full docker info report
+    if docker_socket_reachable():
+        return
+
+    result = run_docker(
+        ["version", "--format", "{{.Server.Version}}"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
     if result.returncode != 0:
-        print(
-            "\n"
-            "╔════════════════════════════════════════════════════════════════╗\n"
-            "║  ERROR: Docker is not running or not accessible               ║\n"
-            "╠════════════════════════════════════════════════════════════════╣\n"
-            "║  ClankerCage requires Docker to run.                          ║\n"
-            "║                                                                ║\n"
-            "║  Please ensure:                                               ║\n"
-            "║    1. Docker is installed                                     ║\n"
-            "║    2. Docker daemon is running                                ║\n"
-            "║    3. You have permission to access Docker                    ║\n"
-            "║       (try: sudo usermod -aG docker $USER)                    ║\n"
-            "╚════════════════════════════════════════════════════════════════╝\n",
-            file=sys.stderr
-        )
+        print(DOCKER_UNAVAILABLE_MESSAGE, file=sys.stderr)
         sys.exit(1)
 
 
-def pull_docker_image_if_needed() -> None:
-    """Pull the Docker image if not already present."""
-    result = subprocess.run(
-        ["docker", "image", "inspect", IMAGE_NAME],
-        capture_output=True
-    )
-    if result.returncode != 0:
+def pull_docker_image_if_needed() -> dict:
+    """Pull the Docker image if not already present and return its info.
+
+    A stamp file in the cache directory records the image's labels once it
+    is known to be present, so runs within IMAGE_STAMP_MAX_AGE return them
+    without calling docker at all. Otherwise the label inspect from
+    get_container_info() doubles as the presence check.
+    """
+    import time
+
+    stamp = get_cache_dir() / "image-stamp.json"
+    try:
+        if time.time() - stamp.stat().st_mtime < IMAGE_STAMP_MAX_AGE:
+            cached = load_json(stamp)
+            if cached.pop("image", None) == IMAGE_NAME:
+                return cached
+    except (FileNotFoundError, ValueError):
+        pass
+
+    info = get_container_info(IMAGE_NAME)
+    if not info["present"]:
         print("Pulling Docker image...")
-        subprocess.run(["docker", "pull", IMAGE_NAME], check=True)
+        run_docker(["pull", IMAGE_NAME], check=True)
+        info = get_container_info(IMAGE_NAME)
+
+    ensure_dir(stamp.parent)
+    write_json(stamp, {"image": IMAGE_NAME, **info})
+    return info
+
+
+def docker_preflight(build: bool) -> dict | None:
+    """Check Docker is accessible and, unless building locally, ensure the image exists.
+
+    Returns the image info from pull_docker_image_if_needed(), or None with --build.
+    """
+    check_docker_accessible()
+    if build:
+        return None
+    return pull_docker_image_if_needed()
+
+
+def prepare_devcontainer(args: argparse.Namespace, project_dir: Path, instance_id: str) -> tuple[Path, Path]:
+    """Extract devcontainer files and render devcontainer.json for an instance.
+
+    Returns the instance workspace directory and the rendered config path.
+    """
+    # Extract embedded devcontainer files to instance-specific cache directory
+    # This prevents race conditions when multiple instances run concurrently
+    cache_dir = extract_devcontainer_files(instance_id)
+    devcontainer_dir = cache_dir / ".devcontainer"
+    source_config = get_embedded_devcontainer_dir() / "devcontainer.json"
+    runtime_config = devcontainer_dir / "devcontainer.json"
+
+    # SSH config and the post-start script go in the instance directory; it is
+    # not under ~/.claude, which every container mounts
+    runtime_dir = cache_dir
+
+    # Skip rendering when the config was already written from identical inputs
+    config_key = get_config_key(args, source_config, project_dir)
+    key_file = cache_dir / "devcontainer.json.key"
+    try:
+        config_current = key_file.read_text() == config_key and os.path.exists(runtime_config)
+    except FileNotFoundError:
+        config_current = False
+    if config_current:
+        # The cached config mounts these by path; they may be missing or stale
+        write_runtime_files(args, runtime_dir)
+    else:
+        # Load and modify config
+        config = load_json(source_config)
+        config = modify_config(config, args, runtime_dir, devcontainer_dir, project_dir)
+
+        # Write modified config to the instance devcontainer dir
+        write_json(runtime_config, config)
+        key_file.write_text(config_key)
+
+    return cache_dir, runtime_config
 
 
 def main() -> None:
@@ -305,44 +770,31 @@ def main() -> None:
     args, claude_args = parser.parse_known_args()
     apply_env_defaults(args)
 
-    if args.ssh_key_file and not Path(args.ssh_key_file).exists():
+    if args.ssh_key_file and not os.path.exists(args.ssh_key_file):
         print(f"Error: SSH key not found at {args.ssh_key_file}", file=sys.stderr)
         sys.exit(1)
 
-    # Check Docker is running before proceeding
-    check_docker_accessible()
-
-    # Pull image if not building locally and image doesn't exist
-    if not args.build:
-        pull_docker_image_if_needed()
-        print_container_info(IMAGE_NAME)
-    else:
-        print("Container image: Local build (--build flag)")
-        print()
-
     # Capture current working directory (the project to mount)
     project_dir = Path.cwd().resolve()
 
-    # Generate unique instance ID early - used for both cache dir and container ID
-    instance_id = uuid.uuid4().hex[:12]
+    # Derive the instance ID early - used for both cache dir and container ID
+    instance_id = get_instance_id(args, project_dir)
 
-    # Extract embedded devcontainer files to instance-specific cache directory
-    # This prevents race conditions when multiple instances run concurrently
-    cache_dir = extract_devcontainer_files(instance_id)
-    devcontainer_dir = cache_dir / ".devcontainer"
-    source_config = devcontainer_dir / "devcontainer.json"
-
-    # Setup runtime directory for SSH config etc (shared, not instance-specific)
-    runtime_dir = Path.home() / ".claude" / "clankercage-runtime"
-    runtime_dir.mkdir(parents=True, exist_ok=True)
+    from concurrent.futures import ThreadPoolExecutor
 
-    # Load and modify config
-    config = json.loads(source_config.read_text())
-    config = modify_config(config, args, runtime_dir, devcontainer_dir, project_dir)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        # The Docker checks and image pull are subprocess-bound, so run them in the
+        # background while files are extracted and the config is rendered.
+        # result() re-raises the SystemExit if Docker is not accessible.
+        preflight = executor.submit(docker_preflight, args.build)
+        cache_dir, runtime_config = prepare_devcontainer(args, project_dir, instance_id)
+        image_info = preflight.result()
 
-    # Write modified config back to the temp devcontainer dir
-    runtime_config = devcontainer_dir / "devcontainer.json"
-    runtime_config.write_text(json.dumps(config, indent=2))
+    if image_info is not None:
+        print_container_info(IMAGE_NAME, image_info)
+    else:
+        print("Container image: Local build (--build flag)")
+        print()
 
     run_devcontainer(runtime_config, cache_dir, project_dir, claude_args, args.shell, args.safe_mode, instance_id)
 
@@ -4,60 +4,194 @@ Shared pytest fixtures for integration tests.
 All tests spin up a real devcontainer and run commands inside it.
 """
 
+import os
+import re
+import selectors
 import subprocess
 import tempfile
+import time
+import uuid
+from functools import cached_property
 from pathlib import Path
 from typing import Generator
 
 import pytest
 
+from clankercage.cli import get_devcontainer_cmd
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--containers-scope",
+        choices=["function", "module", "session"],
+        default="module",
+        help="How long test containers live: function (fully isolated), "
+             "module (default) or session (fastest for local iteration)",
+    )
+    parser.addoption(
+        "--keep-container",
+        action="store_true",
+        help="Leave test containers running and reuse them on the next run",
+    )
+
+
+def containers_scope(fixture_name: str, config: pytest.Config) -> str:
+    """Scope for fixtures that own a container, chosen with --containers-scope."""
+    return config.getoption("--containers-scope")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests marked slow unless SLOW_TESTS is set."""
+    if os.environ.get("SLOW_TESTS"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow test; set SLOW_TESTS=1 to run")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+class ExecResult:
+    """Result of a command run in the container, decoded on first access.
+
+    stdout_bytes and stderr_bytes hold the raw output for callers that parse it.
+    """
+
+    def __init__(self, completed: subprocess.CompletedProcess):
+        self.returncode = completed.returncode
+        self.stdout_bytes: bytes = completed.stdout
+        self.stderr_bytes: bytes = completed.stderr
+
+    @cached_property
+    def stdout(self) -> str:
+        return self.stdout_bytes.decode("utf-8", errors="replace")
+
+    @cached_property
+    def stderr(self) -> str:
+        return self.stderr_bytes.decode("utf-8", errors="replace")
+
 
 class DevContainer:
     """Helper class to manage a devcontainer lifecycle."""
 
+    # Spawning the exec session (CLI start-up, npx, userEnvProbe) can take a
+    # while on a cold machine; it gets its own budget outside exec() timeouts
+    SESSION_START_TIMEOUT = 120
+
     def __init__(self, workspace_dir: str, config_path: Path):
         self.workspace_dir = workspace_dir
         self.config_path = config_path
+        self._cli = get_devcontainer_cmd()
         self._started = False
+        self._session: subprocess.Popen | None = None
 
     def start(self) -> None:
         """Start the devcontainer."""
         result = subprocess.run(
             [
-                "npx", "-y", "@devcontainers/cli", "up",
+                *self._cli, "up",
                 "--workspace-folder", self.workspace_dir,
                 "--config", str(self.config_path),
             ],
             capture_output=True,
-            text=True,
             timeout=300,
         )
         if result.returncode != 0:
-            raise RuntimeError(f"Failed to start container: {result.stderr}")
+            stderr = result.stderr.decode("utf-8", errors="replace")
+            raise RuntimeError(f"Failed to start container: {stderr}")
         self._started = True
+        self._shell()
+
+    def _shell(self) -> subprocess.Popen:
+        """Return the bash session exec() streams commands into, starting it if needed.
 
-    def exec(self, command: str, timeout: int = 60) -> subprocess.CompletedProcess:
-        """Execute a command inside the container."""
+        A new session is only returned once it has answered a no-op command,
+        so the caller's deadline never covers the session start-up.
+        """
+        if self._session is None or self._session.poll() is not None:
+            self._session = subprocess.Popen(
+                [
+                    *self._cli, "exec",
+                    "--workspace-folder", self.workspace_dir,
+                    "--config", str(self.config_path),
+                    "bash",
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            self._run_in_session(self._session, "true", self.SESSION_START_TIMEOUT)
+        return self._session
+
+    def _close_shell(self) -> None:
+        """End the exec session, killing it if it does not exit promptly."""
+        if self._session is None:
+            return
+        self._session.stdin.close()
+        try:
+            self._session.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._session.kill()
+            self._session.wait()
+        self._session = None
+
+    def exec(self, command: str, timeout: int = 60) -> ExecResult:
+        """Execute a command inside the container.
+
+        Commands run in a subshell of one long-lived bash session, so a call
+        costs a pipe write instead of a devcontainer CLI start-up, while cd and
+        variables still do not leak between calls. Unique markers written
+        after the command delimit its stdout, stderr and exit status.
+        """
         if not self._started:
             raise RuntimeError("Container not started")
-        return subprocess.run(
-            [
-                "npx", "-y", "@devcontainers/cli", "exec",
-                "--workspace-folder", self.workspace_dir,
-                "--config", str(self.config_path),
-                "bash", "-c", command,
-            ],
-            capture_output=True,
-            text=True,
-            timeout=timeout,
+        return self._run_in_session(self._shell(), command, timeout)
+
+    def _run_in_session(self, shell: subprocess.Popen, command: str, timeout: float) -> ExecResult:
+        """Send one command to the session and collect its output by the deadline."""
+        marker = f"__clanker_end_{uuid.uuid4().hex}__"
+        shell.stdin.write(
+            f"(\n{command}\n) </dev/null\n"
+            f"printf '\\n%s:%d\\n' {marker} $?\n"
+            f"printf '\\n%s\\n' {marker} >&2\n".encode()
         )
+        shell.stdin.flush()
+
+        stdout_end = re.compile(rb"\n" + marker.encode() + rb":(\d+)\n")
+        stderr_end = b"\n" + marker.encode() + b"\n"
+        buffers = {shell.stdout: bytearray(), shell.stderr: bytearray()}
+        deadline = time.monotonic() + timeout
+        with selectors.DefaultSelector() as selector:
+            for stream in buffers:
+                selector.register(stream, selectors.EVENT_READ)
+            while not (stdout_end.search(buffers[shell.stdout]) and stderr_end in buffers[shell.stderr]):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    # The session is mid-command; drop it so the next exec starts clean
+                    shell.kill()
+                    self._close_shell()
+                    raise subprocess.TimeoutExpired(command, timeout)
+                for key, _ in selector.select(remaining):
+                    chunk = os.read(key.fd, 65536)
+                    if not chunk:
+                        self._close_shell()
+                        raise RuntimeError(f"Exec session ended unexpectedly: {bytes(buffers[shell.stderr])!r}")
+                    buffers[key.fileobj] += chunk
 
-    def stop(self) -> None:
-        """Stop the devcontainer."""
-        if self._started:
+        stdout_match = stdout_end.search(buffers[shell.stdout])
+        return ExecResult(subprocess.CompletedProcess(
+            args=command,
+            returncode=int(stdout_match.group(1)),
+            stdout=bytes(buffers[shell.stdout][:stdout_match.start()]),
+            stderr=bytes(buffers[shell.stderr][:buffers[shell.stderr].index(stderr_end)]),
+        ))
+
+    def stop(self, keep_running: bool = False) -> None:
+        """Stop the devcontainer, or only close the exec session if keep_running."""
+        self._close_shell()
+        if self._started and not keep_running:
             subprocess.run(
                 [
-                    "npx", "-y", "@devcontainers/cli", "down",
+                    *self._cli, "down",
                     "--workspace-folder", self.workspace_dir,
                     "--config", str(self.config_path),
                 ],
@@ -67,13 +201,21 @@ class DevContainer:
             self._started = False
 
 
-@pytest.fixture(scope="module")
-def devcontainer() -> Generator[DevContainer, None, None]:
+@pytest.fixture(scope=containers_scope)
+def devcontainer(request: pytest.FixtureRequest) -> Generator[DevContainer, None, None]:
     """
     Fixture that starts a devcontainer for the test module.
 
     Yields a DevContainer instance that can be used to execute commands.
-    Container is started once per module and stopped after all tests complete.
+    Container is started once per module (or per --containers-scope) and
+    stopped after all tests complete. Each instance gets its own temporary
+    workspace folder, so parallel xdist workers never share a container; run
+    with --dist=loadfile to keep a module's tests, including the ones that
+    change firewall state, on one worker.
+
+    With --keep-container the workspace folder is a fixed path per module
+    (per worker for session scope), so `devcontainer up` finds the container
+    left by the previous run and the container is not stopped afterwards.
     """
     claude_dir = Path.home() / ".claude" / ".devcontainer"
     config_path = claude_dir / "devcontainer.json"
@@ -81,6 +223,18 @@ def devcontainer() -> Generator[DevContainer, None, None]:
     if not config_path.exists():
         pytest.skip(f"devcontainer.json not found at {config_path}")
 
+    if request.config.getoption("--keep-container"):
+        name = re.sub(r"\W+", "-", request.node.nodeid).strip("-")
+        if not name:
+            name = f"session-{os.environ.get('PYTEST_XDIST_WORKER', 'main')}"
+        workspace = Path.home() / ".cache" / "clankercage-tests" / "workspaces" / name
+        workspace.mkdir(parents=True, exist_ok=True)
+        container = DevContainer(str(workspace), config_path)
+        container.start()
+        yield container
+        container.stop(keep_running=True)
+        return
+
     with tempfile.TemporaryDirectory() as tmpdir:
         container = DevContainer(tmpdir, config_path)
         container.start()
@@ -88,17 +242,112 @@ def devcontainer() -> Generator[DevContainer, None, None]:
         container.stop()
 
 
+# Read-only setup state gathered in one exec by container_snapshot
+SNAPSHOT_COMMANDS = {
+    "whoami": "whoami",
+    "ipset": "sudo ipset list -n allowed-domains",
+    "iptables": "sudo iptables -S OUTPUT | head -1",
+    "shell": "echo $SHELL",
+    "oh_my_zsh": "ls ~/.oh-my-zsh",
+    "gpgsign": "git config --global commit.gpgsign",
+    "signingkey": "git config --global user.signingkey",
+    "gpg_secret_keys": "gpg --list-secret-keys --with-colons | awk -F: '$1 == \"sec\" {print; found = 1; exit} END {exit !found}'",
+    "gpg_tty": "echo $GPG_TTY",
+    "gpg_tty_zshrc": "grep GPG_TTY ~/.zshrc",
+}
+
+
+@pytest.fixture(scope=containers_scope)
+def container_snapshot(devcontainer: DevContainer) -> dict[str, ExecResult]:
+    """
+    Fixture that runs every SNAPSHOT_COMMANDS entry in a single exec.
+
+    The state they read is fixed once the container has started, so tests
+    look up their result by name instead of each paying for an exec. Each
+    section is framed on both streams so results keep separate stdout,
+    stderr and exit status.
+    """
+    script = "\n".join(
+        f"printf '\\n@@begin {name}\\n'; printf '\\n@@begin {name}\\n' >&2\n"
+        f"( {command} ) </dev/null; rc=$?\n"
+        f"printf '\\n@@end {name} %d\\n' $rc; printf '\\n@@end {name}\\n' >&2"
+        for name, command in SNAPSHOT_COMMANDS.items()
+    )
+    result = devcontainer.exec(script, timeout=30)
+
+    def section(stream: bytes, name: str, tail: bytes) -> re.Match | None:
+        key = re.escape(name.encode())
+        return re.search(rb"\n@@begin " + key + rb"\n(.*?)\n@@end " + key + tail + rb"\n", stream, re.S)
+
+    snapshot = {}
+    for name, command in SNAPSHOT_COMMANDS.items():
+        out = section(result.stdout_bytes, name, rb" (\d+)")
+        err = section(result.stderr_bytes, name, b"")
+        if out is None or err is None:
+            pytest.fail(f"Snapshot section {name!r} missing:\n{result.stdout}\n{result.stderr}")
+        snapshot[name] = ExecResult(subprocess.CompletedProcess(
+            args=command,
+            returncode=int(out.group(2)),
+            stdout=out.group(1),
+            stderr=err.group(1),
+        ))
+    return snapshot
+
+
+@pytest.fixture(scope=containers_scope)
+def container_tmp_root(devcontainer: DevContainer) -> Generator[str, None, None]:
+    """
+    Fixture that creates a scratch directory in the container for its lifetime.
+
+    Per-test directories live under it, so teardown is one rm -rf instead of
+    each test clearing its own directory first.
+    """
+    result = devcontainer.exec("mktemp -d /tmp/pytest-XXXXXXXX", timeout=30)
+    if result.returncode != 0:
+        pytest.fail(f"Failed to create scratch directory: {result.stderr}")
+    path = result.stdout.strip()
+    yield path
+    devcontainer.exec(f"rm -rf {path}", timeout=10)
+
+
 @pytest.fixture
-def git_repo(devcontainer: DevContainer) -> str:
+def container_tmpdir(container_tmp_root: str) -> str:
     """
-    Fixture that creates a temporary git repo inside the container.
+    Fixture that returns a fresh path inside the container for one test.
 
-    Returns the path to the repo inside the container.
+    The path does not exist yet; tests create it with mkdir or cp -a, so no
+    extra exec is spent on setup.
     """
-    # Create a temp dir and init git repo
+    return f"{container_tmp_root}/{uuid.uuid4().hex[:8]}"
+
+
+@pytest.fixture(scope=containers_scope)
+def repo_template(devcontainer: DevContainer) -> str:
+    """
+    Fixture that builds an initialized, configured git repo once per container.
+
+    Tests copy it with `cp -a` instead of running init and config each time.
+    Returns the path to the template inside the container.
+    """
+    path = "/tmp/_repo_template"
     result = devcontainer.exec(
-        "mktemp -d && cd $(mktemp -d) && git init && git config user.email 'test@test.com' && git config user.name 'Test' && pwd"
+        f"rm -rf {path} && mkdir {path} && cd {path} && git init -q"
+        " && git config user.email 'test@test.com' && git config user.name 'Test'",
+        timeout=30,
     )
+    if result.returncode != 0:
+        pytest.fail(f"Failed to create template repo: {result.stderr}")
+    return path
+
+
+@pytest.fixture
+def git_repo(devcontainer: DevContainer, repo_template: str) -> str:
+    """
+    Fixture that creates a temporary git repo inside the container.
+
+    Returns the path to the repo inside the container.
+    """
+    result = devcontainer.exec(f"repo=$(mktemp -d) && cp -a {repo_template}/. $repo && echo $repo", timeout=30)
     if result.returncode != 0:
         pytest.fail(f"Failed to create git repo: {result.stderr}")
     return result.stdout.strip().split("\n")[-1]
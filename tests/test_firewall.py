@@ -12,6 +12,17 @@ import pytest
 from conftest import DevContainer
 
 
+def tcp_probe(host: str, port: int = 443, connect_timeout: int = 1) -> str:
+    """
+    Command that opens a raw TCP connection to host, giving up after connect_timeout seconds.
+
+    Dropped SYNs look like packet loss, so a blocked connect only fails at
+    the timeout; the 1s default keeps the blocked checks cheap. Probes that
+    expect to connect over the WAN should pass a longer timeout.
+    """
+    return f"timeout {connect_timeout} bash -c 'exec 3<>/dev/tcp/{host}/{port}'"
+
+
 def describe_firewall():
     """Tests for the iptables/ipset firewall."""
 
@@ -19,16 +30,14 @@ def describe_firewall():
     def it_blocks_non_whitelisted_domains(devcontainer: DevContainer):
         """Verify that domains not in the whitelist are blocked."""
         # example.com is not in our whitelist
-        result = devcontainer.exec(
-            "curl --connect-timeout 5 -s https://example.com",
-            timeout=15,
-        )
+        result = devcontainer.exec(tcp_probe("example.com"), timeout=30)
         # Should fail - either connection refused or timeout
         assert result.returncode != 0, (
-            f"Expected blocked domain to fail, but curl succeeded: {result.stdout}"
+            f"Expected blocked domain to fail, but connect succeeded: {result.stdout}"
         )
 
     @pytest.mark.integration
+    @pytest.mark.wan
     def it_allows_whitelisted_domains(devcontainer: DevContainer):
         """Verify that whitelisted domains are accessible."""
         # api.github.com is in our whitelist
@@ -43,13 +52,11 @@ def describe_firewall():
         assert len(result.stdout.strip()) > 0, "Expected non-empty response from GitHub"
 
     @pytest.mark.integration
+    @pytest.mark.wan
     def it_allows_dynamically_approved_domains(devcontainer: DevContainer):
         """Verify that domains can be added to the whitelist at runtime."""
         # First verify httpbin.org is blocked
-        result = devcontainer.exec(
-            "curl --connect-timeout 5 -s https://httpbin.org/get",
-            timeout=15,
-        )
+        result = devcontainer.exec(tcp_probe("httpbin.org"), timeout=5)
         # Should fail initially
         initial_blocked = result.returncode != 0
 
@@ -62,17 +69,22 @@ def describe_firewall():
             f"Failed to add domain to firewall: {result.stderr}"
         )
 
-        # Now it should work
+        # An approved IP should now be in the set; this is a local kernel lookup.
+        # httpbin.org resolves to several rotating IPs, so accept any of them
         result = devcontainer.exec(
-            "curl --connect-timeout 10 -s https://httpbin.org/get",
-            timeout=20,
+            "for ip in $(getent ahostsv4 httpbin.org | awk '{print $1}' | sort -u); do"
+            " sudo ipset test allowed-domains \"$ip\" 2>/dev/null && exit 0; done; exit 1",
+            timeout=5,
         )
         assert result.returncode == 0, (
-            f"Domain should be accessible after approval: {result.stderr}"
+            f"httpbin.org IP not added to allowed-domains: {result.stderr}"
         )
 
-        # Verify we got valid JSON back
-        assert '"url"' in result.stdout, "Expected JSON response from httpbin"
+        # And a connection through the firewall should now succeed
+        result = devcontainer.exec(tcp_probe("httpbin.org", connect_timeout=10), timeout=15)
+        assert result.returncode == 0, (
+            f"Domain should be accessible after approval: {result.stderr}"
+        )
 
         # Log whether it was initially blocked (informational)
         if not initial_blocked:
@@ -84,7 +96,7 @@ def describe_firewall():
         # Try to add an invalid domain
         result = devcontainer.exec(
             "sudo /usr/local/bin/add-domain-to-firewall.sh 'invalid domain with spaces'",
-            timeout=10,
+            timeout=5,
         )
         assert result.returncode != 0, "Should reject invalid domain format"
         assert "Invalid domain format" in result.stderr or "ERROR" in result.stderr
@@ -92,18 +104,13 @@ def describe_firewall():
     @pytest.mark.integration
     def it_loads_domains_from_whitelist_file(devcontainer: DevContainer):
         """Verify that the domains file is loaded correctly."""
-        # Check that the domains file exists
+        # Count non-comment, non-blank lines and look for a known domain in one pass
         result = devcontainer.exec(
-            "cat /usr/local/share/whitelisted-domains.txt | grep -v '^#' | grep -v '^$' | wc -l",
-            timeout=10,
+            "awk '!/^#/ && $0 != \"\" {n++} index($0, \"registry.npmjs.org\") {f=1} END {print n+0, f+0}'"
+            " /usr/local/share/whitelisted-domains.txt",
+            timeout=5,
         )
-        assert result.returncode == 0
-        domain_count = int(result.stdout.strip())
+        assert result.returncode == 0, f"Failed to read whitelist file: {result.stderr}"
+        domain_count, has_npm = map(int, result.stdout.split())
         assert domain_count > 20, f"Expected at least 20 domains, got {domain_count}"
-
-        # Verify a known domain is in the file
-        result = devcontainer.exec(
-            "grep 'registry.npmjs.org' /usr/local/share/whitelisted-domains.txt",
-            timeout=10,
-        )
-        assert result.returncode == 0, "registry.npmjs.org should be in whitelist file"
+        assert has_npm, "registry.npmjs.org should be in whitelist file"
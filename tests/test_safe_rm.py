@@ -7,23 +7,26 @@ These tests verify that:
 - safe-rm works normally outside of git repos
 """
 
+import re
+
 import pytest
 
 from conftest import DevContainer
 
+# safe-rm refuses with "Uncommitted changes detected"; a bare "commit" would
+# also match the git commit output earlier in the same stdout
+UNCOMMITTED_RE = re.compile(r"uncommitted changes", re.IGNORECASE)
+
 
 def describe_safe_rm():
     """Tests for the safe-rm deletion wrapper."""
 
     @pytest.mark.integration
-    def it_blocks_deletion_with_uncommitted_changes(devcontainer: DevContainer):
+    def it_blocks_deletion_with_uncommitted_changes(devcontainer: DevContainer, repo_template: str, container_tmpdir: str):
         """Verify that safe-rm refuses to delete files when there are uncommitted changes."""
         # Create a git repo with uncommitted changes
-        result = devcontainer.exec("""
-            cd /tmp && rm -rf test-safe-rm && mkdir test-safe-rm && cd test-safe-rm
-            git init
-            git config user.email 'test@test.com'
-            git config user.name 'Test'
+        result = devcontainer.exec(f"""
+            cp -a {repo_template} {container_tmpdir} && cd {container_tmpdir}
             echo "initial" > file1.txt
             git add file1.txt
             git commit -m "initial"
@@ -31,24 +34,21 @@ def describe_safe_rm():
             # Now try to delete file1.txt with uncommitted file2.txt present
             safe-rm file1.txt 2>&1
             echo "exit_code=$?"
-        """, timeout=30)
+        """, timeout=10)
 
         # safe-rm should fail
         assert "exit_code=1" in result.stdout, (
             f"Expected safe-rm to fail with uncommitted changes: {result.stdout}"
         )
-        assert "uncommitted changes" in result.stdout.lower() or "commit" in result.stdout.lower(), (
+        assert UNCOMMITTED_RE.search(result.stdout), (
             f"Expected error message about uncommitted changes: {result.stdout}"
         )
 
     @pytest.mark.integration
-    def it_allows_deletion_with_clean_git_state(devcontainer: DevContainer):
+    def it_allows_deletion_with_clean_git_state(devcontainer: DevContainer, repo_template: str, container_tmpdir: str):
         """Verify that safe-rm allows deletion when all changes are committed."""
-        result = devcontainer.exec("""
-            cd /tmp && rm -rf test-safe-rm-clean && mkdir test-safe-rm-clean && cd test-safe-rm-clean
-            git init
-            git config user.email 'test@test.com'
-            git config user.name 'Test'
+        result = devcontainer.exec(f"""
+            cp -a {repo_template} {container_tmpdir} && cd {container_tmpdir}
             echo "to be deleted" > delete-me.txt
             echo "to keep" > keep-me.txt
             git add .
@@ -57,8 +57,8 @@ def describe_safe_rm():
             safe-rm delete-me.txt
             echo "exit_code=$?"
             # Verify file is gone
-            ls delete-me.txt 2>&1 || echo "file_deleted=true"
-        """, timeout=30)
+            [ ! -e delete-me.txt ] && echo "file_deleted=true"
+        """, timeout=10)
 
         assert "exit_code=0" in result.stdout, (
             f"Expected safe-rm to succeed with clean state: {result.stdout}"
@@ -68,16 +68,16 @@ def describe_safe_rm():
         )
 
     @pytest.mark.integration
-    def it_works_outside_git_repos(devcontainer: DevContainer):
+    def it_works_outside_git_repos(devcontainer: DevContainer, container_tmpdir: str):
         """Verify that safe-rm works normally outside of git repositories."""
-        result = devcontainer.exec("""
-            cd /tmp && rm -rf test-non-git && mkdir test-non-git && cd test-non-git
+        result = devcontainer.exec(f"""
+            mkdir {container_tmpdir} && cd {container_tmpdir}
             echo "test file" > testfile.txt
             # Not a git repo - should work without restrictions
             safe-rm testfile.txt
             echo "exit_code=$?"
-            ls testfile.txt 2>&1 || echo "file_deleted=true"
-        """, timeout=30)
+            [ ! -e testfile.txt ] && echo "file_deleted=true"
+        """, timeout=10)
 
         assert "exit_code=0" in result.stdout, (
             f"Expected safe-rm to succeed outside git repo: {result.stdout}"
@@ -87,13 +87,10 @@ def describe_safe_rm():
         )
 
     @pytest.mark.integration
-    def it_passes_through_rm_options(devcontainer: DevContainer):
+    def it_passes_through_rm_options(devcontainer: DevContainer, repo_template: str, container_tmpdir: str):
         """Verify that safe-rm passes options through to rm."""
-        result = devcontainer.exec("""
-            cd /tmp && rm -rf test-rm-options && mkdir test-rm-options && cd test-rm-options
-            git init
-            git config user.email 'test@test.com'
-            git config user.name 'Test'
+        result = devcontainer.exec(f"""
+            cp -a {repo_template} {container_tmpdir} && cd {container_tmpdir}
             mkdir -p subdir/nested
             echo "nested file" > subdir/nested/file.txt
             git add .
@@ -101,8 +98,8 @@ def describe_safe_rm():
             # Use -rf to recursively delete
             safe-rm -rf subdir
             echo "exit_code=$?"
-            ls -la subdir 2>&1 || echo "dir_deleted=true"
-        """, timeout=30)
+            [ ! -e subdir ] && echo "dir_deleted=true"
+        """, timeout=10)
 
         assert "exit_code=0" in result.stdout, (
             f"Expected safe-rm -rf to succeed: {result.stdout}"